@@ -2,24 +2,275 @@ import os
 import cv2
 import numpy as np
 import base64
+import functools
+import io
+import queue
+import re
+import secrets
+import shlex
+import struct
+import subprocess
+import threading
 import time
-from lxml import html
-from uiautomator2 import connect
+from typing import Optional
+from lxml import etree
+from uiautomator2 import ShellResponse, connect
+from uiautomator2.xpath import XPathError as XPathSelectorError
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 current_dir = os.getcwd()
+_TYPING_CHUNK = 3
+_XML_PARSER = etree.XMLParser(recover=True, huge_tree=True, remove_blank_text=True, collect_ids=False)
+_STREAMABLE_XPATH = re.compile(r"^//node\[([^\[\]/]*)\]$")
+_U2_INCOMPATIBLE_XPATH = re.compile(r"\bnode\b|@class\b")
+_XPATH_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"")
+_ATTRIBUTE_PREDICATE = re.compile(r"(?:\s+|@[\w-]+|and|or|not|contains|starts-with|!?=|[(),]|'')*")
+_BOUNDS_RE = re.compile(r"\[(\d+),(\d+)\]\[(\d+),(\d+)\]")
+_RGBA_PIXEL_FORMATS = (1, 2)  # PIXEL_FORMAT_RGBA_8888, PIXEL_FORMAT_RGBX_8888
+_NUMBA_MIN_BOUNDS = 64
+_PYRAMID_LEVELS = 2
+_PYRAMID_MIN_SIZE = 16
+_PYRAMID_MARGIN = 4
+_PYRAMID_SLACK = 0.25
+_PYRAMID_CANDIDATES = 5
+
+
+@functools.lru_cache(maxsize=256)
+def _xp(expr: str) -> etree.XPath:
+    """Compile an XPath expression once and reuse it."""
+    return etree.XPath(expr)
+
+
+@functools.lru_cache(maxsize=64)
+def _load_template(path: str, mtime: float) -> np.ndarray:
+    """Decode a template image once per (path, mtime) pair."""
+    return cv2.imread(path)
+
+
+@functools.lru_cache(maxsize=64)
+def _template_features(path: str, mtime: float) -> tuple:
+    """Compute the size, SIFT keypoints and descriptors of a template once per (path, mtime) pair."""
+    gray = cv2.cvtColor(_load_template(path, mtime), cv2.COLOR_BGR2GRAY)
+    return gray.shape, cv2.SIFT_create().detectAndCompute(gray, None)
+
+
+def _match_template(screen: np.ndarray, template: np.ndarray, threshold: float):
+    """Return the top-left corner of the best match of template in screen, or None below threshold.
+
+    A Gaussian pyramid proposes a few candidate windows; when none of them reaches the threshold at
+    full resolution, a full-resolution search settles it so no match is missed.
+    """
+    pyramid = [(screen, template)]
+    while len(pyramid) <= _PYRAMID_LEVELS and min(pyramid[-1][1].shape[:2]) >= 2 * _PYRAMID_MIN_SIZE:
+        pyramid.append((cv2.pyrDown(pyramid[-1][0]), cv2.pyrDown(pyramid[-1][1])))
+
+    if len(pyramid) > 1:
+        candidates = [_refine_candidate(pyramid, x, y) for x, y in _coarse_peaks(*pyramid[-1], threshold)]
+        # Highest score wins; ties go to the first in row-major order, like a full search
+        best = max(candidates, key=lambda c: (c[0], -c[1][1], -c[1][0]), default=None)
+        if best is not None and best[0] >= threshold:
+            return best[1]
+
+    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_loc if max_val >= threshold else None
+
+
+def _coarse_peaks(screen: np.ndarray, template: np.ndarray, threshold: float) -> list:
+    """Return up to _PYRAMID_CANDIDATES separated peaks of the coarse match within _PYRAMID_SLACK of threshold."""
+    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+    height, width = template.shape[:2]
+    peaks = []
+    for _ in range(_PYRAMID_CANDIDATES):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+        if max_val < threshold - _PYRAMID_SLACK:
+            break
+        peaks.append((x, y))
+        result[max(y - height // 2, 0):y + height // 2 + 1, max(x - width // 2, 0):x + width // 2 + 1] = -1
+    return peaks
+
+
+def _refine_candidate(pyramid: list, x: int, y: int) -> tuple:
+    """Follow a coarse match down the pyramid, returning its full-resolution score and top-left corner."""
+    score = -1.0
+    for screen_level, template_level in reversed(pyramid[:-1]):
+        x, y = 2 * x, 2 * y
+        height, width = template_level.shape[:2]
+        left, top = max(x - _PYRAMID_MARGIN, 0), max(y - _PYRAMID_MARGIN, 0)
+        roi = screen_level[top:y + height + _PYRAMID_MARGIN, left:x + width + _PYRAMID_MARGIN]
+        result = cv2.matchTemplate(roi, template_level, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        x, y = left + x, top + y
+    return score, (x, y)
+
+
+def _streamable_predicate(element: str) -> Optional[str]:
+    """Return the predicate of a //node[...] expression that only tests attributes, else None."""
+    match = _STREAMABLE_XPATH.match(element)
+    if match is None:
+        return None
+    # Positional tests such as [1] or [last()] need the whole tree, so only attribute comparisons qualify
+    if not _ATTRIBUTE_PREDICATE.fullmatch(_XPATH_LITERAL.sub("''", match.group(1))):
+        return None
+    return match.group(1)
+
+
+def _parse_bounds_kernel(buffer: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Fill out with the four integers of each newline-separated bounds string in buffer."""
+    row = col = value = 0
+    in_number = False
+    for char in buffer:
+        if 48 <= char <= 57:
+            value = value * 10 + (char - 48)
+            in_number = True
+        elif in_number:
+            out[row, col] = value
+            value = 0
+            in_number = False
+            col += 1
+            if col == 4:
+                col = 0
+                row += 1
+    return out
+
+
+if njit is not None:
+    _parse_bounds_kernel = njit(cache=True)(_parse_bounds_kernel)
+
+
+def _parse_bounds_many(bounds_list: list) -> list:
+    """Return the top-left corners of many bounds strings, using the Numba kernel for large batches."""
+    if njit is None or len(bounds_list) < _NUMBA_MIN_BOUNDS:
+        return [_parse_bounds(bounds) for bounds in bounds_list]
+    buffer = np.frombuffer(("\n".join(bounds_list) + "\n").encode("ascii"), dtype=np.uint8)
+    out = _parse_bounds_kernel(buffer, np.empty((len(bounds_list), 4), dtype=np.int32))
+    return [tuple(corner) for corner in out[:, :2].tolist()]
+
+
+def _poll(fn, tries: int, start: float = 0.1, cap: float = 0.5):
+    """Call fn until it returns a truthy value or tries * 0.5 seconds pass, backing off exponentially."""
+    deadline = time.monotonic() + tries * 0.5
+    delay = start
+    while True:
+        result = fn()
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(cap, delay * 1.5)
+
+
+def _parse_bounds(bounds: str) -> tuple:
+    """Return the top-left corner of a uiautomator bounds string like [x1,y1][x2,y2]."""
+    match = _BOUNDS_RE.match(bounds)
+    return int(match[1]), int(match[2])
+
 
 class ADB:
+    _PERMISSIONS = (
+        "android.permission.WRITE_EXTERNAL_STORAGE", "android.permission.READ_EXTERNAL_STORAGE",
+        "android.permission.READ_PHONE_STATE", "android.permission.CALL_PHONE",
+        "android.permission.ACCESS_FINE_LOCATION", "android.permission.ACCESS_COARSE_LOCATION",
+        "android.permission.CAMERA", "android.permission.READ_CONTACTS",
+        "android.permission.WRITE_CONTACTS", "android.permission.READ_CALENDAR",
+        "android.permission.WRITE_CALENDAR", "android.permission.RECORD_AUDIO",
+    )
+
     def __init__(self, serial: str = None) -> None:
         """Initialize ADB connection to the device."""
         self.device = connect(serial)
+        self.serial = self.device.serial
+        self._shell_lock = threading.Lock()
+        self._shell_lines = queue.Queue()
+        self._shell_sentinel = f"__END_{secrets.token_hex(8)}__".encode("utf-8")
+        self._xml_cache = (0.0, None)
+        try:
+            self._shell_proc = subprocess.Popen(
+                ["adb", "-s", self.serial, "shell"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            )
+        except OSError:
+            # No adb binary on PATH; uiautomator2 talks to the adb server directly
+            self._shell_proc = None
+        else:
+            threading.Thread(target=self._read_shell, args=(self._shell_proc,), daemon=True).start()
+            # A session that cannot reach the device exits at once; detect it before the first real command
+            try:
+                self._run_in_shell("true", timeout=10)
+            except (TimeoutError, ConnectionError):
+                pass
+
+    def close(self):
+        """Terminate the persistent shell session."""
+        with self._shell_lock:
+            self._stop_shell()
+
+    def _stop_shell(self):
+        """Kill the persistent shell session; later shell() calls go through device.shell."""
+        proc, self._shell_proc = self._shell_proc, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    def _read_shell(self, proc: subprocess.Popen):
+        """Forward lines printed by the persistent shell session, then None once it exits."""
+        for line in iter(proc.stdout.readline, b""):
+            self._shell_lines.put(line)
+        self._shell_lines.put(None)
 
     def info(self):
         """Print device information."""
         print(self.device.info)
 
-    def shell(self, command: str):
-        """Execute shell command on the device."""
-        return self.device.shell(command)
+    def shell(self, command: str, timeout: float = 60) -> ShellResponse:
+        """Execute shell command on the device through the persistent shell session."""
+        self._invalidate_xml_cache()
+        with self._shell_lock:
+            if self._shell_proc is not None and self._shell_proc.poll() is None:
+                response = self._run_in_shell(command, timeout)
+                if response is not None:
+                    return response
+            return self.device.shell(command, timeout=timeout)
+
+    def _run_in_shell(self, command: str, timeout: float) -> Optional[ShellResponse]:
+        """Run command in the persistent session, or return None if the session died before it started."""
+        # Run in a quoted sh with stdin closed so the command cannot eat the session input
+        script = (
+            f"sh -c {shlex.quote(command)} </dev/null 2>&1; "
+            f"printf '\\n%s %d\\n' {self._shell_sentinel.decode('utf-8')} $?\n"
+        )
+        try:
+            self._shell_proc.stdin.write(script.encode("utf-8"))
+            self._shell_proc.stdin.flush()
+        except OSError:
+            self._stop_shell()
+            return None
+
+        deadline = time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                line = self._shell_lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self._stop_shell()
+                raise TimeoutError(f"Shell command timed out after {timeout}s: {command}")
+            if line is None:
+                self._stop_shell()
+                # Without any output the command never ran, so the caller can safely retry it elsewhere
+                if not output:
+                    return None
+                raise ConnectionError(f"Shell session closed while running: {command}")
+            if line.startswith(self._shell_sentinel + b" "):
+                exit_code = int(line[len(self._shell_sentinel) + 1:])
+                break
+            output.append(line)
+        return ShellResponse(b"".join(output).decode("utf-8", errors="replace")[:-1], exit_code)
 
     def open_link(self, url: str, package_name: str = None):
         """Open a URL in the specified package or the default browser."""
@@ -30,51 +281,102 @@ class ADB:
 
     def open_app(self, package_name: str):
         """Launch the specified app using its package name."""
+        self._invalidate_xml_cache()
         self.device.app_start(package_name)
 
     def delete_cache(self, package_name: str):
         """Clear the cache of the specified app."""
+        self._invalidate_xml_cache()
         self.device.app_clear(package_name)
 
     def grant_permissions(self, package_name: str):
         """Grant necessary permissions to the specified app."""
-        permissions = [
-            "android.permission.WRITE_EXTERNAL_STORAGE", "android.permission.READ_EXTERNAL_STORAGE",
-            "android.permission.READ_PHONE_STATE", "android.permission.CALL_PHONE",
-            "android.permission.ACCESS_FINE_LOCATION", "android.permission.ACCESS_COARSE_LOCATION",
-            "android.permission.CAMERA", "android.permission.READ_CONTACTS", 
-            "android.permission.WRITE_CONTACTS", "android.permission.READ_CALENDAR", 
-            "android.permission.WRITE_CALENDAR", "android.permission.RECORD_AUDIO"
-        ]
-        for permission in permissions:
-            self.shell(f"pm grant {package_name} {permission}")
+        self.shell(";".join(f"pm grant {package_name} {permission}" for permission in self._PERMISSIONS))
 
     def list_apps(self):
         """Print the list of installed apps on the device."""
         for app in self.device.app_list():
             print(f"{app}\r")
 
-    def screen_capture(self) -> str:
-        """Take a screenshot and save it to the resources directory."""
+    def screen_capture(self, save: bool = False):
+        """Take a screenshot as a BGR array, or save it to the resources directory and return its path."""
+        if not save:
+            screen = self._screencap_raw()
+            return screen if screen is not None else self._screencap_pil()
         os.makedirs("resources", exist_ok=True)
         path = os.path.join(current_dir, "resources", "screenshot_window_0.png")
         self.device.screenshot(path)
         return path
 
-    def get_coordinates_image(self, target_image_path: str, threshold: float = 1) -> tuple:
-        """Get the coordinates of the target image on the screen."""
-        target_image = cv2.imread(target_image_path)
-        template_image = cv2.imread(self.screen_capture())
+    def _screencap_raw(self, timeout: float = 10):
+        """Read the raw framebuffer through `adb exec-out screencap` as a BGR array, or None if unsupported."""
+        try:
+            buffer = subprocess.run(
+                ["adb", "-s", self.serial, "exec-out", "screencap"], capture_output=True, check=True, timeout=timeout
+            ).stdout
+        except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return None
+        if len(buffer) < 12:
+            return None
+
+        # Header is width, height, format and, on newer Android versions, a color space
+        width, height, pixel_format = struct.unpack_from("<3I", buffer)
+        header_size = len(buffer) - width * height * 4
+        if pixel_format not in _RGBA_PIXEL_FORMATS or header_size not in (12, 16):
+            return None
+        pixels = np.frombuffer(buffer, dtype=np.uint8, offset=header_size).reshape(height, width, 4)
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+
+    def _screencap_pil(self) -> np.ndarray:
+        """Take a screenshot through uiautomator2 and view the decoded PIL buffer as a BGR array."""
+        pixels = np.asarray(self.device.screenshot())
+        code = cv2.COLOR_RGBA2BGR if pixels.shape[2] == 4 else cv2.COLOR_RGB2BGR
+        return cv2.cvtColor(pixels, code)
+
+    def get_coordinates_image(self, target_image_path, threshold: float = 1) -> tuple:
+        """Get the coordinates of the target image, given as a file path or BGR array, on the screen."""
+        if isinstance(target_image_path, str):
+            target_image = _load_template(target_image_path, os.path.getmtime(target_image_path))
+        else:
+            target_image = target_image_path
+        template_image = self.screen_capture()
         
         # Perform template matching
-        result = cv2.matchTemplate(template_image, target_image, method=cv2.TM_CCOEFF_NORMED)
-        y_coords, x_coords = np.where(result >= threshold)
-        
-        # Return the center of the first match found
-        if x_coords.size > 0 and y_coords.size > 0:
-            return int(x_coords[0] + target_image.shape[1] // 2), int(y_coords[0] + target_image.shape[0] // 2)
+        match = _match_template(template_image, target_image, threshold)
+
+        # Return the center of the match found
+        if match:
+            return match[0] + target_image.shape[1] // 2, match[1] + target_image.shape[0] // 2
         return False
 
+    def get_coordinates_sift(self, target_image_path: str, ratio: float = 0.5, min_matches: int = 10) -> tuple:
+        """Get the center of the target image on the screen using SIFT features and a FLANN matcher."""
+        (height, width), (target_keypoints, target_descriptors) = _template_features(
+            target_image_path, os.path.getmtime(target_image_path)
+        )
+        screen_image = cv2.cvtColor(self.screen_capture(), cv2.COLOR_BGR2GRAY)
+        screen_keypoints, screen_descriptors = cv2.SIFT_create().detectAndCompute(screen_image, None)
+        if target_descriptors is None or screen_descriptors is None or len(screen_descriptors) < 2:
+            return False
+
+        # Keep matches that pass Lowe's ratio test
+        matcher = cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=50))
+        good = [
+            pair[0] for pair in matcher.knnMatch(target_descriptors, screen_descriptors, k=2)
+            if len(pair) == 2 and pair[0].distance < ratio * pair[1].distance
+        ]
+        if len(good) < min_matches:
+            return False
+
+        # Project the template center onto the screen
+        source = np.float32([target_keypoints[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
+        destination = np.float32([screen_keypoints[m.trainIdx].pt for m in good]).reshape(-1, 1, 2)
+        homography, _ = cv2.findHomography(source, destination, cv2.RANSAC, 5.0)
+        if homography is None:
+            return False
+        center = cv2.perspectiveTransform(np.float32([[[width / 2, height / 2]]]), homography)[0][0]
+        return int(center[0]), int(center[1])
+
     def click(self, x: int, y: int):
         """Simulate a tap on the device at the specified coordinates."""
         self.shell(f"input tap {x} {y}")
@@ -89,17 +391,19 @@ class ADB:
 
     def click_text(self, text: str):
         """Click on a UI element containing the specified text."""
+        self._invalidate_xml_cache()
         self.device(text=text).click()
 
     def click_xpath(self, xpath: str):
         """Click on a UI element specified by its XPath."""
-        if self.device.xpath(xpath=xpath).exists:
-            self.device.xpath(xpath=xpath).click()
-        else:
-            pass
+        self._invalidate_xml_cache()
+        element = self.device.xpath(xpath=xpath)
+        if element.exists:
+            element.click()
 
     def click_resource(self, resource_id: str):
         """Click on a UI element identified by its resource ID."""
+        self._invalidate_xml_cache()
         try:
             self.device(resourceId=resource_id).click()
         except Exception as e:
@@ -107,87 +411,138 @@ class ADB:
 
     def click_resource_text(self, resource_id: str, text: str):
         """Click on a UI element identified by its resource ID and text ID."""
+        self._invalidate_xml_cache()
         try:
             self.device(resourceId=resource_id, text=text).click()
         except Exception as e:
             print(f"Error clicking resource: {e}")
 
-    def dump_xml(self) -> str:
-        """Dump the current UI hierarchy as XML and save it to a file."""
+    def dump_xml(self, persist: bool = True) -> Optional[str]:
+        """Dump the current UI hierarchy as XML, cache the parsed tree and optionally save it to a file."""
+        xml_content = self._dump_hierarchy()
+        self._xml_cache = (time.monotonic(), etree.fromstring(xml_content, _XML_PARSER))
+        if not persist:
+            return None
         os.makedirs("resources", exist_ok=True)
         xml_file_path = os.path.join(current_dir, "resources", "window_dump_0.xml")
-        xml_content = self.device.dump_hierarchy(compressed=False, pretty=False, max_depth=None)
-        with open(xml_file_path, "w", encoding="utf-8") as file:
+        with open(xml_file_path, "wb") as file:
             file.write(xml_content)
         return xml_file_path
 
-    def find_xml(self, element: str, path_file: str, index: int = 0):
+    def _dump_hierarchy(self) -> bytes:
+        """Dump the current UI hierarchy as raw XML bytes."""
+        return self.device.dump_hierarchy(compressed=False, pretty=False, max_depth=None).encode("utf-8")
+
+    def _invalidate_xml_cache(self):
+        """Drop the cached hierarchy after an action that may change the screen."""
+        self._xml_cache = (0.0, None)
+
+    def get_tree(self, max_age: float = 0.2):
+        """Return the parsed UI hierarchy, dumping it again if the cached tree is older than max_age."""
+        timestamp, tree = self._xml_cache
+        if tree is None or time.monotonic() - timestamp > max_age:
+            self.dump_xml(persist=False)
+            tree = self._xml_cache[1]
+        return tree
+
+    def find_xml(self, element: str, path_file: str = None, index: int = 0):
         """Find coordinates of a specified element."""
         coords = []
         try:
-            etree_xml = html.parse(path_file).xpath(element)
+            if path_file is None:
+                etree_xml = _xp(element)(self.get_tree())
+            else:
+                etree_xml = _xp(element)(etree.parse(path_file, _XML_PARSER))
         except:
             return ([], None)
-        coordinates_xml = [
-            bounds.attrib["bounds"].split("][")[0].replace("[", "").split(",") 
-            for bounds in etree_xml
-        ]
-        coords.extend(tuple(map(int, coord)) for coord in coordinates_xml)
+        coords.extend(_parse_bounds_many([bounds.attrib["bounds"] for bounds in etree_xml]))
         return (coords, etree_xml[index] if etree_xml else None)
 
-    def get_coordinates_xml(self, element: str) -> list:
-        """Get coordinates of a specified element from the dumped XML."""
+    def get_coordinates_xml(self, element: str, stream: bool = False, max_age: float = 0.2) -> list:
+        """Get coordinates of a specified element from the dumped XML.
+
+        With stream=True, a plain attribute predicate such as //node[@text='OK'] is matched
+        while the dump is parsed incrementally, so peak memory follows the tree depth.
+        A cached tree younger than max_age seconds is reused; pass 0 to always dump. Polling callers
+        pass both, since a fresh dump per attempt gains nothing from building the whole tree.
+        """
         coords = []
-        windows_xml_path = self.dump_xml()
-        etree_xml = html.parse(windows_xml_path)
-        coordinates_xml = [
-            bounds.attrib["bounds"].split("][")[0].replace("[", "").split(",") 
-            for bounds in etree_xml.xpath(element)
-        ]
-        coords.extend(tuple(map(int, coord)) for coord in coordinates_xml)
+        predicate = _streamable_predicate(element) if stream else None
+        if predicate is not None:
+            bounds_xml = self._stream_bounds_xml(_xp(f"self::node[{predicate}]"))
+        else:
+            bounds_xml = [bounds.attrib["bounds"] for bounds in _xp(element)(self.get_tree(max_age))]
+        coords.extend(_parse_bounds_many(bounds_xml))
         return coords
 
+    def _stream_bounds_xml(self, predicate: etree.XPath) -> list:
+        """Collect the bounds of nodes matching predicate in document order, freeing each node once it is parsed."""
+        bounds_xml = []
+        events = etree.iterparse(
+            io.BytesIO(self._dump_hierarchy()), events=("start", "end"), tag="node", recover=True, huge_tree=True
+        )
+        for event, elem in events:
+            # Attributes are complete on start, which keeps matches in document order like the tree path
+            if event == "start":
+                if predicate(elem):
+                    bounds_xml.append(elem.attrib["bounds"])
+                continue
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return bounds_xml
+
+    def _wait_coordinates_xml(self, element: str, retries: int = 15) -> list:
+        """Wait for an element and return its coordinates, using uiautomator2's xpath engine when it applies.
+
+        uiautomator2 renames every node to its class and drops @class, so expressions relying on
+        node tags or @class are polled against our own dump instead. Invalid expressions give [].
+        """
+        try:
+            if element.lstrip("(").startswith("/") and not _U2_INCOMPATIBLE_XPATH.search(element):
+                selector = self.device.xpath(element)
+                # all() dumps once per attempt, so coordinates come from the same source that matched
+                elements = _poll(selector.all, retries) or []
+                return [tuple(el.bounds[:2]) for el in elements]
+            _xp(element)
+        except (XPathSelectorError, etree.XPathError):
+            return []
+        return _poll(lambda: self.get_coordinates_xml(element, stream=True, max_age=0), retries) or []
+
     def check_text(self, text: str, retries: int = 30) -> bool:
         """Check if a specified text exists in the UI."""
-        for _ in range(retries):
-            if self.device(text=text).exists:
-                return True
-            time.sleep(0.5)
-        return False
+        return bool(_poll(lambda: self.device(text=text).exists, retries))
 
     def check_text_xml(self, text: str, retries: int = 30) -> bool:
         """Check if a specified text exists in the dumped XML."""
-        for _ in range(retries):
-            windows_xml_path = self.dump_xml()
-            with open(windows_xml_path, "r", encoding="utf-8") as file:
-                xml_content = file.read()
-                if text in xml_content:
-                    return True
-            time.sleep(0.5)
-        return False
+        text_bytes = text.encode("utf-8")
+
+        def text_found():
+            # A native lookup is cheaper than a full dump and textContains also covers exact text
+            if self.device(textContains=text).exists:
+                return True
+            return text_bytes in self._dump_hierarchy()
+
+        return bool(_poll(text_found, retries))
 
     def click_coordinates_xml(self, element: str, index: int = 0):
         """Click on the coordinates of an element specified by its XPath from the XML."""
-        for _ in range(15):
-            part = self.get_coordinates_xml(element)
-            if part:
-                coords = part[index]
-                self.click(coords[0], coords[1])
-                return True
-            time.sleep(0.5)
-        return False
+        part = self._wait_coordinates_xml(element)
+        if not part:
+            return False
+        coords = part[index]
+        self.click(coords[0], coords[1])
+        return True
 
     def scrollable(self, element: str, times: int = 1, index: int = 0):
         """Scroll to a specified element and click on it."""
-        for _ in range(15):
-            part = self.get_coordinates_xml(element)
-            if part:
-                coords = part[index]
-                for _ in range(times):
-                    self.click(coords[0], coords[1])
-                return True
-            time.sleep(0.5)
-        return False
+        part = self._wait_coordinates_xml(element)
+        if not part:
+            return False
+        coords = part[index]
+        for _ in range(times):
+            self.click(coords[0], coords[1])
+        return True
 
     def send_text(self, text: str, use_vn_keyboard: bool = True, slow_typing: bool = True):
         """Send text input to the device."""
@@ -195,9 +550,13 @@ class ADB:
             self.shell("ime set com.android.adbkeyboard/.AdbIME")
             time.sleep(1)
             if slow_typing:
-                for char in text:
-                    char_b64 = base64.b64encode(char.encode("utf-8")).decode("utf-8")
-                    self.shell(f"am broadcast -a ADB_INPUT_B64 --es msg {char_b64}")
+                chunks_b64 = [
+                    base64.b64encode(text[i:i + _TYPING_CHUNK].encode("utf-8")).decode("utf-8")
+                    for i in range(0, len(text), _TYPING_CHUNK)
+                ]
+                self.shell("; ".join(
+                    f"am broadcast -a ADB_INPUT_B64 --es msg {chunk_b64}; sleep 0.05" for chunk_b64 in chunks_b64
+                ))
             else:
                 text_b64 = base64.b64encode(text.encode("utf-8")).decode("utf-8")
                 self.shell(f"am broadcast -a ADB_INPUT_B64 --es msg {text_b64}")
@@ -211,6 +570,7 @@ class ADB:
                 self.shell(f"input text '{text}'")
 
     def Back(self):
+        self._invalidate_xml_cache()
         self.device.press("back")
 
 class NodeChecker:
@@ -219,16 +579,28 @@ class NodeChecker:
 
     def is_element_checked(self, **kwargs):
         max_attempts = kwargs.get("repeat", 20)
-        index = kwargs.get("index", 0)
 
-        for _ in range(max_attempts):
-            xml_content = self.adb_instance.dump_xml()
-            for element_name, expected_value in kwargs.items():
-                is_checked, _ = self.adb_instance.find_xml(expected_value, xml_content, index=index)
-                if is_checked:
-                    return element_name
-            time.sleep(0.5)
-        return "notElement"
+        # Compile every candidate once; options and invalid expressions never match
+        candidates = []
+        for element_name, expected_value in kwargs.items():
+            if element_name in ("repeat", "index"):
+                continue
+            try:
+                candidates.append((element_name, _xp(expected_value)))
+            except (etree.XPathError, TypeError):
+                continue
+
+        def find_checked():
+            tree = self.adb_instance.get_tree(max_age=0)
+            for element_name, xpath in candidates:
+                try:
+                    if xpath(tree):
+                        return element_name
+                except etree.XPathError:
+                    continue
+            return None
+
+        return _poll(find_checked, max_attempts) or "notElement"
 
     def check_xml_element(self, **kwargs):
         element_name = kwargs.get("element", "")
@@ -236,14 +608,13 @@ class NodeChecker:
         index = kwargs.get("index", 0)
         should_click = kwargs.get("click", True)
 
-        for _ in range(max_attempts):
-            coordinates = self.adb_instance.get_coordinates_xml(element_name)
-            
-            if coordinates:
-                if index < len(coordinates):
-                    x, y = coordinates[index]
-                    if should_click:
-                        self.adb_instance.click(x, y)
-                    return True
-            time.sleep(0.5)
-        return False
+        def find_coordinates():
+            coordinates = self.adb_instance.get_coordinates_xml(element_name, stream=True, max_age=0)
+            return coordinates[index] if coordinates and -len(coordinates) <= index < len(coordinates) else None
+
+        coords = _poll(find_coordinates, max_attempts)
+        if not coords:
+            return False
+        if should_click:
+            self.adb_instance.click(*coords)
+        return True